@@ -8,7 +8,11 @@ from datetime import datetime, timedelta
 from todoist_api_python.api import TodoistAPI
 import os
 from dotenv import load_dotenv
-from models import TodoistNode, TodoistProject
+from src.sources.todoist import (
+    create_todoist_node_from_task_with_project,
+    create_todoist_project_from_api_response,
+    get_project_by_id,
+)
 import zoneinfo
 
 # Load environment variables from .env file
@@ -18,15 +22,33 @@ load_dotenv()
 TODOIST_TOKEN = os.getenv("TODOIST_ACCESS_TOKEN")
 api = TodoistAPI(TODOIST_TOKEN) if TODOIST_TOKEN else None
 
+DEBUG = bool(os.getenv("DEBUG"))
+
+
+# %%
+project_paginator = api.get_projects()
+project_nodes = [
+    create_todoist_project_from_api_response(p)
+    for project_page in project_paginator
+    for p in project_page
+]
+project_by_id = get_project_by_id(project_nodes)
+if DEBUG:
+    print("\n".join(map(str, project_nodes)))
+
+# %%
+print(len(project_nodes))
 
 # %%
 tasks_paginator = api.get_tasks()
 task_nodes = []
 for task_page in tasks_paginator:
-    for task in task_page:
-        print(task)
-        task_nodes.append(TodoistNode.from_api_response(task))
-        print(task_nodes[-1])
+    task_nodes.extend(
+        create_todoist_node_from_task_with_project(t, project_by_id.get(t.project_id))
+        for t in task_page
+    )
+if DEBUG:
+    print("\n".join(map(str, task_nodes)))
 
 # %%
 print(len(task_nodes))
@@ -37,19 +59,12 @@ completed_tasks_paginator = api.get_completed_tasks_by_completion_date(
 )
 completed_task_nodes = []
 for task_page in completed_tasks_paginator:
-    for completed_task in task_page:
-        completed_task_nodes.append(TodoistNode.from_api_response(completed_task))
-        print(completed_task_nodes[-1])
+    completed_task_nodes.extend(
+        create_todoist_node_from_task_with_project(t, project_by_id.get(t.project_id))
+        for t in task_page
+    )
+if DEBUG:
+    print("\n".join(map(str, completed_task_nodes)))
 # %%
 print(len(completed_task_nodes))
 # %%
-project_paginator = api.get_projects()
-project_nodes = []
-for project_page in project_paginator:
-    for project in project_page:
-        project_nodes.append(TodoistProject.from_api_response(project))
-        print(project_nodes[-1])
-
-# %%
-print(len(project_nodes))
-# %%
@@ -1,4 +1,5 @@
 import argparse
+import logging
 import os
 import fcntl
 import time
@@ -224,6 +225,9 @@ def main():
     """
     Main function to handle command line arguments and update cache.
     """
+    # Show progress logged by the sources (e.g. Todoist fetch counts)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
     parser = argparse.ArgumentParser(
         description="Update cache for specified data sources"
     )
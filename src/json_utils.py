@@ -0,0 +1,14 @@
+"""
+JSON parsing shared by the Instapaper source and the tag descriptions.
+
+orjson is used when it is installed; otherwise the standard library parses.
+"""
+
+try:
+    import orjson
+
+    json_loads = orjson.loads
+except ImportError:  # orjson is optional, fall back to the standard library
+    import json
+
+    json_loads = json.loads
@@ -13,17 +13,30 @@ def strip_timezone(
     if dt is None:
         return None
 
-    # If it's a date object, convert to datetime
-    if isinstance(dt, datetime.date) and not isinstance(dt, datetime.datetime):
-        return datetime.datetime.combine(dt, datetime.time.min)
-
-    # If it's a datetime object with timezone info, remove it
-    if isinstance(dt, datetime.datetime) and dt.tzinfo is not None:
-        return dt.replace(tzinfo=None)
+    # Dispatch on the exact type first (the common case)
+    t = type(dt)
+    if t is datetime.datetime:
+        return dt.replace(tzinfo=None) if dt.tzinfo is not None else dt
+    if t is datetime.date:
+        return datetime.datetime(dt.year, dt.month, dt.day)
+
+    # Subclasses of date/datetime fall back to the isinstance checks
+    if isinstance(dt, datetime.datetime):
+        return dt.replace(tzinfo=None) if dt.tzinfo is not None else dt
+    if isinstance(dt, datetime.date):
+        return datetime.datetime(dt.year, dt.month, dt.day)
 
     return dt
 
 
+def truncate(text: str, length: int) -> str:
+    """
+    Shorten text to its first length characters, marked with "...", for
+    previews in __str__.
+    """
+    return text[:length] + "..." if len(text) > length else text
+
+
 class Node(pydantic.BaseModel):
     """
     Base class for all nodes, containing common mandatory fields.
@@ -50,12 +63,7 @@ class ObsidianNode(Node):
     # TODO: add links
 
     def __str__(self) -> str:
-        content_preview = (
-            self.markdown_content[:20] + "..."
-            if len(self.markdown_content) > 20
-            else self.markdown_content
-        )
-        return f"ObsidianNode(name='{self.name}', tags={self.tags}, date={self.date}, absolute_path='{self.absolute_path}', markdown_content='{content_preview}')"
+        return f"ObsidianNode(name='{self.name}', tags={self.tags}, date={self.date}, absolute_path='{self.absolute_path}', markdown_content='{truncate(self.markdown_content, 20)}')"
 
 
 class TodoistProject(pydantic.BaseModel):
@@ -108,10 +116,7 @@ class TodoistNode(Node):
     )
 
     def __str__(self) -> str:
-        content_preview = (
-            self.content[:30] + "..." if len(self.content) > 30 else self.content
-        )
-        return f"TodoistNode(name='{self.name}', task_id='{self.task_id}', content='{content_preview}', priority={self.priority}, due={self.due})"
+        return f"TodoistNode(name='{self.name}', task_id='{self.task_id}', content='{truncate(self.content, 30)}', priority={self.priority}, due={self.due})"
 
 
 class InstapaperNode(Node):
@@ -134,8 +139,7 @@ class InstapaperNode(Node):
     )
 
     def __str__(self) -> str:
-        title_preview = self.title[:30] + "..." if len(self.title) > 30 else self.title
-        return f"InstapaperNode(name='{self.name}', title='{title_preview}', url='{self.url}', is_read={self.is_read}, folder='{self.folder}')"
+        return f"InstapaperNode(name='{self.name}', title='{truncate(self.title, 30)}', url='{self.url}', is_read={self.is_read}, folder='{self.folder}')"
 
 
 class CalendarNode(Node):
@@ -176,8 +180,7 @@ class CalendarNode(Node):
     )
 
     def __str__(self) -> str:
-        name_preview = self.name[:30] + "..." if len(self.name) > 30 else self.name
-        return f"CalendarNode(name='{name_preview}', start_time={self.start_time}, end_time={self.end_time})"
+        return f"CalendarNode(name='{truncate(self.name, 30)}', start_time={self.start_time}, end_time={self.end_time})"
 
     @classmethod
     def from_ical_event(cls, event) -> "CalendarNode":
@@ -185,13 +188,12 @@ class CalendarNode(Node):
         Create CalendarNode from an iCalendar event.
         """
         # Extract basic event data
-        summary = str(event.get("summary", "")) if event.get("summary") else ""
-        description = (
-            str(event.get("description", "")) if event.get("description") else None
-        )
-        location = str(event.get("location", "")) if event.get("location") else None
-        organizer = str(event.get("organizer", "")) if event.get("organizer") else None
-        status = str(event.get("status", "")) if event.get("status") else None
+        summary = str(s) if (s := event.get("summary")) else ""
+        description = str(d) if (d := event.get("description")) else None
+        location = str(loc) if (loc := event.get("location")) else None
+        organizer = str(org) if (org := event.get("organizer")) else None
+        status = str(st) if (st := event.get("status")) else None
+        event_id = str(uid) if (uid := event.get("uid")) else ""
 
         # Extract dates
         start_time = event.get("dtstart")
@@ -220,7 +222,7 @@ class CalendarNode(Node):
 
         return cls(
             name=summary,  # Use summary as the name
-            event_id=str(event.get("uid", "")) if event.get("uid") else "",
+            event_id=event_id,
             description=description,
             location=location,
             start_time=start_dt,
@@ -278,12 +280,13 @@ class Cache(pydantic.BaseModel):
         """
         Load the cache from the path.
         """
-        with open(path, "r") as f:
+        with open(path, "rb") as f:
             return cls.model_validate_json(f.read())
 
     def to_path(self, path: str) -> None:
         """
         Save the cache to the path.
         """
-        with open(path, "w") as f:
-            f.write(self.model_dump_json())
+        # Serialize straight to UTF-8 bytes to skip the intermediate str
+        with open(path, "wb") as f:
+            f.write(self.__pydantic_serializer__.to_json(self))
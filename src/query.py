@@ -20,9 +20,12 @@ from src.tag_descriptions import get_source_tag_descriptions
 from typing import Callable
 from datetime import datetime, timedelta
 from pydantic import BaseModel, Field, field_validator
-from jinja2 import Template
-import re
+import bisect
+from collections import Counter, OrderedDict
 import functools
+import itertools
+import operator
+from functools import cached_property
 
 
 def parse_relative_date(date_str: str) -> datetime:
@@ -38,57 +41,101 @@ def parse_relative_date(date_str: str) -> datetime:
     
     Returns datetime object representing the calculated date.
     """
+    return datetime.now() + parse_relative_offset(date_str)
+
+
+@functools.lru_cache(maxsize=512)
+def parse_relative_offset(date_str: str) -> timedelta:
+    """
+    Parse a relative date string into its offset from now. Memoized, since the
+    same few tokens ('-7d', 'now', ...) recur across queries; the offset is
+    applied to a fresh datetime.now() by parse_relative_date.
+    """
     if not date_str:
         raise ValueError("Empty date string")
     
+    s = date_str.lower()
+
     # Handle special case: "now"
-    if date_str.lower() == 'now':
-        return datetime.now()
-    
-    # Match pattern: optional +/- sign, number, unit (d/w/m/y)
-    pattern = r'^([+-]?)(\d+)([dwmy])$'
-    match = re.match(pattern, date_str.lower())
-    
-    if not match:
+    if s == 'now':
+        return timedelta()
+
+    # Parse by hand: optional +/- sign, number, unit (d/w/m/y)
+    sign = s[0] if s[0] in '+-' else ''
+    number = s[len(sign):-1]
+    unit = s[-1]
+
+    if unit not in 'dwmy' or not number.isdecimal():
         raise ValueError(f"Invalid relative date format: {date_str}. Expected format like '-7d', '+1m', '-1y', or 'now'")
     
-    sign, number, unit = match.groups()
-    
     # Convert sign to multiplier
     multiplier = -1 if sign == '-' else 1
     amount = int(number) * multiplier
     
-    # Calculate the date based on unit
-    now = datetime.now()
-    
+    # Calculate the offset based on unit
     if unit == 'd':  # days
-        return now + timedelta(days=amount)
+        return timedelta(days=amount)
     elif unit == 'w':  # weeks
-        return now + timedelta(weeks=amount)
+        return timedelta(weeks=amount)
     elif unit == 'm':  # months (approximate as 30 days)
-        return now + timedelta(days=amount * 30)
+        return timedelta(days=amount * 30)
     elif unit == 'y':  # years (approximate as 365 days)
-        return now + timedelta(days=amount * 365)
+        return timedelta(days=amount * 365)
     else:
         raise ValueError(f"Unsupported time unit: {unit}")
 
 
-# Jinja template for formatting all data sources together
-MASTER_PROMPT_TEMPLATE = """QUERY: "{{ query }}"
-{% if obsidian_output %}
-{{ obsidian_output }}
-{% endif %}{% if todoist_output %}
-{{ todoist_output }}
-{% endif %}{% if instapaper_output %}
-{{ instapaper_output }}
-{% endif %}{% if calendar_output %}
-{{ calendar_output }}
-{% endif %}{% if health_output %}
-{{ health_output }}
-{% endif %}
-{% if not obsidian_output and not todoist_output and not instapaper_output and not calendar_output and not health_output %}
-No results found for the given query.
-{% endif %}"""
+# Prompt builder for each source, in the order sections appear in the prompt
+PROMPT_CREATORS: dict[str, Callable[[list], str]] = {
+    "obsidian": create_obsidian_prompt,
+    # Query results are already in the Todoist prompt's date order
+    "todoist": functools.partial(create_todoist_prompt, presorted=True),
+    "instapaper": create_instapaper_prompt,
+    "calendar": create_calendar_prompt,
+    "health": create_health_prompt,
+}
+
+# Rendered source sections, keyed by (source, ids of the rendered nodes). The
+# cache is bounded both by entry count and by the total characters it holds,
+# since a broad query can render a whole source
+PROMPT_CACHE_SIZE = 8
+PROMPT_CACHE_MAX_CHARS = 2_000_000
+_prompt_cache: OrderedDict[tuple[str, tuple[int, ...]], tuple[list, str]] = (
+    OrderedDict()
+)
+_prompt_cache_chars = 0
+
+# Shown in place of the source sections when a query matches nothing
+NO_RESULTS_MESSAGE = "No results found for the given query."
+
+
+def render_source_prompt(source: str, nodes: list) -> str:
+    """
+    Renders a source's section of the prompt, reusing the previous render when
+    the same nodes (by identity) were rendered before.
+    """
+    key = (source, tuple(map(id, nodes)))
+    cached = _prompt_cache.get(key)
+    if cached is not None:
+        _prompt_cache.move_to_end(key)
+        return cached[1]
+
+    global _prompt_cache_chars
+
+    prompt = PROMPT_CREATORS[source](nodes)
+    if len(prompt) > PROMPT_CACHE_MAX_CHARS:
+        return prompt
+
+    # Keep the nodes alive alongside the prompt so their ids stay unique
+    _prompt_cache[key] = (nodes, prompt)
+    _prompt_cache_chars += len(prompt)
+    while (
+        len(_prompt_cache) > PROMPT_CACHE_SIZE
+        or _prompt_cache_chars > PROMPT_CACHE_MAX_CHARS
+    ):
+        _, (_, evicted) = _prompt_cache.popitem(last=False)
+        _prompt_cache_chars -= len(evicted)
+    return prompt
 
 
 class Query(BaseModel):
@@ -102,6 +149,14 @@ class Query(BaseModel):
     )
     to_date: datetime | None = Field(default=None, description="End date for filtering")
 
+    @cached_property
+    def _source_set(self) -> frozenset[str] | None:
+        return frozenset(self.source) if self.source is not None else None
+
+    @cached_property
+    def _tag_set(self) -> frozenset[str] | None:
+        return frozenset(self.tag) if self.tag is not None else None
+
     @field_validator("source")
     @classmethod
     def validate_source(cls, v):
@@ -118,14 +173,29 @@ class Query(BaseModel):
     def parse_date(cls, v):
         if v is None or isinstance(v, datetime):
             return v
-        
-        # Try relative date format first (e.g., -7d, +1m, -1y)
+        if not isinstance(v, str):
+            raise ValueError(f"Date must be a string or datetime. Got: {v!r}")
+
+        # Fast path for absolute dates (YYYY-MM-DD): slice directly when the
+        # shape matches, before trying the relative parser
+        if (
+            len(v) == 10
+            and v[4] == "-"
+            and v[7] == "-"
+            and (v[:4] + v[5:7] + v[8:]).isdigit()
+        ):
+            try:
+                return datetime(int(v[:4]), int(v[5:7]), int(v[8:]))
+            except ValueError:
+                pass
+
+        # Try relative date format (e.g., -7d, +1m, -1y)
         try:
             return parse_relative_date(v)
         except ValueError:
             pass
-        
-        # Try absolute date format (YYYY-MM-DD)
+
+        # Fall back to strptime for other YYYY-MM-DD spellings
         try:
             return datetime.strptime(v, "%Y-%m-%d")
         except ValueError:
@@ -194,6 +264,25 @@ class Query(BaseModel):
         return query_obj
 
 
+@functools.cache
+def get_nodes_by_source() -> dict[
+    str,
+    list[ObsidianNode | TodoistNode | InstapaperNode | CalendarNode | HealthNode],
+]:
+    """
+    Loads all the nodes from cache, keyed by data source.
+    """
+    cache = load_cache()
+
+    return {
+        "obsidian": cache.obsidian_notes,
+        "todoist": cache.todoist_tasks,
+        "instapaper": cache.instapaper_articles,
+        "calendar": cache.calendar_events,
+        "health": cache.health_data,
+    }
+
+
 @functools.cache
 def get_all_nodes() -> list[
     ObsidianNode | TodoistNode | InstapaperNode | CalendarNode | HealthNode
@@ -201,18 +290,43 @@ def get_all_nodes() -> list[
     """
     Loads all the nodes from cache.
     """
-    cache = load_cache()
-
     # Concatenate all nodes from different sources
     all_nodes = []
-    all_nodes.extend(cache.obsidian_notes)
-    all_nodes.extend(cache.todoist_tasks)
-    all_nodes.extend(cache.instapaper_articles)
-    all_nodes.extend(cache.calendar_events)
-    all_nodes.extend(cache.health_data)
+    for nodes in get_nodes_by_source().values():
+        all_nodes.extend(nodes)
     return all_nodes
 
 
+@functools.cache
+def get_date_index() -> dict[
+    str,
+    tuple[
+        list[datetime],
+        list[ObsidianNode | TodoistNode | InstapaperNode | CalendarNode | HealthNode],
+        list[ObsidianNode | TodoistNode | InstapaperNode | CalendarNode | HealthNode],
+    ],
+]:
+    """
+    Returns, per source, (dates, dated_nodes, undated_nodes) where dated_nodes is
+    sorted by date ascending and dates is the parallel list of their dates.
+    """
+    index = {}
+    for source, nodes in get_nodes_by_source().items():
+        # Sorting the reversed list keeps equal dates in their original order
+        # once a slice is read back to front
+        dated_nodes = sorted(
+            (node for node in reversed(nodes) if node.date is not None),
+            key=operator.attrgetter("date"),
+        )
+        undated_nodes = [node for node in nodes if node.date is None]
+        index[source] = (
+            [node.date for node in dated_nodes],
+            dated_nodes,
+            undated_nodes,
+        )
+    return index
+
+
 def get_query_lambdas(
     query: Query,
 ) -> list[
@@ -222,24 +336,14 @@ def get_query_lambdas(
 ]:
     """
     Returns a list of lambda functions, one for each field in the query.
+    Sources and dates are not included: run() only scans the requested
+    sources and slices them by date using the date index.
     """
     lambdas = []
 
-    # Source filtering lambda
-    if query.source is not None:
-
-        def source_filter(
-            node: ObsidianNode
-            | TodoistNode
-            | InstapaperNode
-            | CalendarNode
-            | HealthNode,
-        ) -> bool:
-            return node.data_source in query.source
-
-        lambdas.append(source_filter)
-
     # Tag filtering lambda
+    # Captured values are bound as default arguments so each call reads fast
+    # locals rather than closure cells
     if query.tag is not None:
 
         def tag_filter(
@@ -248,71 +352,64 @@ def get_query_lambdas(
             | InstapaperNode
             | CalendarNode
             | HealthNode,
+            isdisjoint: Callable[[list[str]], bool] = query._tag_set.isdisjoint,
         ) -> bool:
-            return any(tag in node.tags for tag in query.tag)
+            return not isdisjoint(node.tags)
 
         lambdas.append(tag_filter)
 
-    # From date filtering lambda
-    if query.from_date is not None:
-
-        def from_date_filter(
-            node: ObsidianNode
-            | TodoistNode
-            | InstapaperNode
-            | CalendarNode
-            | HealthNode,
-        ) -> bool:
-            return node.date is None or node.date >= query.from_date
-
-        lambdas.append(from_date_filter)
-
-    # To date filtering lambda
-    if query.to_date is not None:
-
-        def to_date_filter(
-            node: ObsidianNode
-            | TodoistNode
-            | InstapaperNode
-            | CalendarNode
-            | HealthNode,
-        ) -> bool:
-            return node.date is None or node.date <= query.to_date
+    return lambdas
 
-        lambdas.append(to_date_filter)
 
-    return lambdas
+def get_query_filter(
+    query: Query,
+) -> (
+    Callable[
+        [ObsidianNode | TodoistNode | InstapaperNode | CalendarNode | HealthNode], bool
+    ]
+    | None
+):
+    """
+    Returns the query's per-node predicate, or None if it has none. Sources and
+    dates are handled by the date index, so the tag filter is the only one.
+    """
+    lambdas = get_query_lambdas(query)
+    return lambdas[0] if lambdas else None
 
 
-def get_query_help() -> str:
+@functools.cache
+def get_tag_stats() -> tuple[list[str], dict[str, list[str]], Counter]:
     """
-    Returns comprehensive help information about the query language.
+    Returns (sources, tags_by_source, tag_counts) for the cached nodes, where each
+    source's tags are sorted by count (most common first).
     """
-    # Get all nodes to extract available sources and tags
-    all_nodes = get_all_nodes()
+    # Count tags per source, then sum for the overall counts
+    counts_by_source = {
+        source: Counter(itertools.chain.from_iterable(node.tags for node in nodes))
+        for source, nodes in get_nodes_by_source().items()
+        if nodes
+    }
+    tag_counts = sum(counts_by_source.values(), Counter())
 
     # Extract unique sources
-    sources = list(set(node.data_source for node in all_nodes))
-    sources.sort()
+    sources = sorted(counts_by_source)
 
-    # Extract tags by source with counts
-    tags_by_source = {}
-    tag_counts = {}
+    # Sort tags within each source by overall count (most common first)
+    tags_by_source = {
+        source: sorted(counts, key=tag_counts.__getitem__, reverse=True)
+        for source, counts in counts_by_source.items()
+    }
 
-    for node in all_nodes:
-        if node.data_source not in tags_by_source:
-            tags_by_source[node.data_source] = set()
-        tags_by_source[node.data_source].update(node.tags)
+    return sources, tags_by_source, tag_counts
 
-        # Count occurrences of each tag
-        for tag in node.tags:
-            tag_counts[tag] = tag_counts.get(tag, 0) + 1
 
-    # Sort tags within each source by count (most common first)
-    for source in tags_by_source:
-        source_tags = list(tags_by_source[source])
-        source_tags.sort(key=lambda tag: tag_counts.get(tag, 0), reverse=True)
-        tags_by_source[source] = source_tags
+@functools.cache
+def get_query_help() -> str:
+    """
+    Returns comprehensive help information about the query language.
+    Cached, since it only depends on the (process-wide cached) nodes.
+    """
+    sources, tags_by_source, tag_counts = get_tag_stats()
 
     help_text = f"""# Everything2Prompt Query Language Guide
 
@@ -477,49 +574,38 @@ def run(query_string: str) -> str:
     # Parse the query string
     query = Query.from_string(query_string)
 
-    # Get all nodes from cache
-    all_nodes = get_all_nodes()
-
-    # Get filtering lambdas
-    filter_lambdas = get_query_lambdas(query)
-
-    # Apply all filters sequentially
-    filtered_nodes = all_nodes
-    for filter_func in filter_lambdas:
-        filtered_nodes = [node for node in filtered_nodes if filter_func(node)]
-
-    # Sort by date (most recent first)
-    filtered_nodes.sort(key=lambda x: (x.date is None, x.date), reverse=True)
-
-    # Separate nodes by type
-    obsidian_nodes = [node for node in filtered_nodes if isinstance(node, ObsidianNode)]
-    todoist_nodes = [node for node in filtered_nodes if isinstance(node, TodoistNode)]
-    instapaper_nodes = [
-        node
-        for node in filtered_nodes
-        if isinstance(node, InstapaperNode) and node.date is not None
-    ]
-    calendar_nodes = [node for node in filtered_nodes if isinstance(node, CalendarNode)]
-    health_nodes = [node for node in filtered_nodes if isinstance(node, HealthNode)]
-
-    obsidian_output = create_obsidian_prompt(obsidian_nodes) if obsidian_nodes else ""
-    todoist_output = create_todoist_prompt(todoist_nodes) if todoist_nodes else ""
-    instapaper_output = (
-        create_instapaper_prompt(instapaper_nodes) if instapaper_nodes else ""
-    )
-    calendar_output = create_calendar_prompt(calendar_nodes) if calendar_nodes else ""
-    health_output = create_health_prompt(health_nodes) if health_nodes else ""
-
-    # Create formatted prompt using the master template
-    template = Template(MASTER_PROMPT_TEMPLATE)
-    prompt = template.render(
-        query=query_string,
-        obsidian_output=obsidian_output,
-        todoist_output=todoist_output,
-        instapaper_output=instapaper_output,
-        calendar_output=calendar_output,
-        health_output=health_output,
-    )
+    # Get the filtering predicate
+    query_filter = get_query_filter(query)
+
+    # Only scan the requested sources, sliced to the date range. Nodes come out
+    # most recent first, with undated nodes ahead of them.
+    date_index = get_date_index()
+    requested = query._source_set if query.source is not None else PROMPT_CREATORS
+    outputs = {}
+    for source in requested:
+        if source not in date_index:
+            continue
+        dates, dated_nodes, undated_nodes = date_index[source]
+        lo = bisect.bisect_left(dates, query.from_date) if query.from_date else 0
+        hi = bisect.bisect_right(dates, query.to_date) if query.to_date else len(dates)
+        candidates = reversed(dated_nodes[lo:hi])
+        # Undated Instapaper articles are never shown
+        if source != "instapaper":
+            candidates = itertools.chain(undated_nodes, candidates)
+
+        # Apply the filter as one mask over the candidates
+        nodes = list(candidates)
+        if query_filter is not None:
+            nodes = list(itertools.compress(nodes, map(query_filter, nodes)))
+
+        if nodes:
+            outputs[source] = render_source_prompt(source, nodes)
+
+    # Assemble the prompt: query header, then each non-empty source section
+    sections = [outputs[source] for source in PROMPT_CREATORS if source in outputs]
+    prompt = f'QUERY: "{query_string}"\n'
+    prompt += "".join(f"\n{section}\n" for section in sections)
+    prompt += "\n" if sections else f"\n\n{NO_RESULTS_MESSAGE}\n"
 
     return prompt
 
@@ -1,8 +1,3 @@
-import sys
-from pathlib import Path
-
-sys.path.append(str(Path(__file__).parent.parent.parent))
-
 import requests
 import os
 from typing import List, Dict
@@ -48,13 +43,15 @@ Organizer: {{ event.organizer }}{% endif %}{% if event.calendar_name %}
 Calendar: {{ event.calendar_name }}{% endif %}{% endfor %}
 """
 
+# Template object for create_calendar_prompt, built when the module loads
+_CALENDAR_TEMPLATE = Template(CALENDAR_PROMPT_TEMPLATE)
+
 
 def create_calendar_prompt(events: List[CalendarNode]) -> str:
     """
     Create a formatted prompt from a list of CalendarNode objects.
     """
-    template = Template(CALENDAR_PROMPT_TEMPLATE)
-    return template.render(events=events)
+    return _CALENDAR_TEMPLATE.render(events=events)
 
 
 def get_events_from_calendar(
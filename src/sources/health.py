@@ -1,8 +1,3 @@
-import sys
-from pathlib import Path
-
-sys.path.append(str(Path(__file__).parent.parent.parent))
-
 import csv
 import os
 from datetime import datetime
@@ -25,6 +20,9 @@ Date: {{ entry.date.strftime('%Y-%m-%d') }}{% for key, value in entry.health_met
 {% endfor %}
 """
 
+# Both create_health_prompt definitions below render this compiled template
+_HEALTH_TEMPLATE = Template(HEALTH_PROMPT_TEMPLATE)
+
 
 def create_health_prompt(health_nodes: List[HealthNode]) -> str:
     """
@@ -43,9 +41,7 @@ def create_health_prompt(health_nodes: List[HealthNode]) -> str:
     health_nodes.sort(key=lambda x: x.date, reverse=True)
 
     # Use Jinja template to format the data
-    template = Template(HEALTH_PROMPT_TEMPLATE)
-
-    return template.render(entries=health_nodes)
+    return _HEALTH_TEMPLATE.render(entries=health_nodes)
 
 
 def get_all_health_data() -> List[HealthNode]:
@@ -149,6 +145,4 @@ def create_health_prompt(health_nodes: List[HealthNode]) -> str:
     health_nodes.sort(key=lambda x: x.date, reverse=True)
 
     # Use Jinja template to format the data
-    template = Template(HEALTH_PROMPT_TEMPLATE)
-
-    return template.render(entries=health_nodes)
+    return _HEALTH_TEMPLATE.render(entries=health_nodes)
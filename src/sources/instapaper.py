@@ -1,16 +1,15 @@
-import sys
-from pathlib import Path
-
-sys.path.append(str(Path(__file__).parent.parent.parent))
-
+import io
 import requests
 import os
+import time
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 from src.models import InstapaperNode
-from jinja2 import Template
-from requests_oauthlib import OAuth1Session
+from src.json_utils import json_loads
+from requests.adapters import HTTPAdapter
+from requests_oauthlib import OAuth1
 import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -24,24 +23,52 @@ CONSUMER_SECRET = os.getenv("INSTAPAPER_CONSUMER_SECRET")  # Your OAuth Consumer
 ACCESS_TOKEN = os.getenv("INSTAPAPER_ACCESS_TOKEN")
 ACCESS_TOKEN_SECRET = os.getenv("INSTAPAPER_ACCESS_TOKEN_SECRET")
 
-# Jinja template for formatting Instapaper articles
-INSTAPAPER_PROMPT_TEMPLATE = """*** Instapaper Articles ***
+# Rate-limited (429) and transient server errors are retried with exponential
+# backoff, honouring Retry-After up to INSTAPAPER_MAX_BACKOFF_SECONDS
+INSTAPAPER_RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+INSTAPAPER_MAX_RETRIES = 5
+INSTAPAPER_BACKOFF_SECONDS = 0.5
+INSTAPAPER_MAX_BACKOFF_SECONDS = 30.0
+INSTAPAPER_REQUEST_TIMEOUT_SECONDS = 30.0
+
+# Header of the Instapaper prompt, followed by one block per article
+INSTAPAPER_PROMPT_HEADER = """*** Instapaper Articles ***
 Title = article headline/title
 URL = web page URL
 Tags = user-applied tags for organization
 Date = date saved to Instapaper (none if no date available). importantly, not the date of reading.
 Read = true=marked as read, false=unread
-{% for article in articles %}
---- Article {{ loop.index }} ---
-Title: {{ article.title }}
-URL: {{ article.url }}{% if article.tags %}
-Tags: {{ article.tags | join(', ') }}{% endif %}{% if article.date %}
-Date: {{ article.date.strftime('%Y-%m-%d') }}{% else %}
-Date: none{% endif %}
-Read: {{ article.is_read }}{% endfor %}
 """
 
 
+def parse_response_json(response: requests.Response) -> Any:
+    """
+    Parse the JSON body of an API response, using orjson when it is installed.
+    """
+    return json_loads(response.content)
+
+
+def get_retry_delay(attempt: int, retry_after: Optional[str] = None) -> float:
+    """
+    Get how long to wait before retrying a failed request.
+
+    Args:
+        attempt: 0-based index of the attempt that failed
+        retry_after: Retry-After header of the response, if any
+
+    Returns:
+        The server's Retry-After (in seconds) if valid, otherwise exponential
+        backoff, capped at INSTAPAPER_MAX_BACKOFF_SECONDS
+    """
+    delay = INSTAPAPER_BACKOFF_SECONDS * 2**attempt
+    if retry_after:
+        try:
+            delay = max(0.0, float(retry_after))
+        except ValueError:  # An HTTP date; fall back to backoff
+            pass
+    return min(delay, INSTAPAPER_MAX_BACKOFF_SECONDS)
+
+
 class InstapaperAPI:
     """
     A read-only class to interact with the Instapaper API using OAuth 1.0a authentication.
@@ -62,6 +89,43 @@ class InstapaperAPI:
         if not all([self.consumer_key, self.consumer_secret]):
             raise ValueError("Consumer key and secret are required")
 
+        # Reuse one connection pool (keep-alive) across all API calls
+        self._session = requests.Session()
+        self._session.mount(
+            "https://", HTTPAdapter(pool_connections=10, pool_maxsize=20)
+        )
+
+        # OAuth signer for the current access token, rebuilt if the token changes
+        self._oauth_auth = None
+        self._oauth_auth_token = None
+
+    def close(self) -> None:
+        """
+        Close the underlying HTTP session.
+        """
+        self._session.close()
+
+    def __enter__(self) -> "InstapaperAPI":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    def _get_oauth_auth(self) -> OAuth1:
+        """
+        Get the OAuth signer for the current access token.
+        """
+        token = (self.access_token, self.access_token_secret)
+        if self._oauth_auth is None or self._oauth_auth_token != token:
+            self._oauth_auth = OAuth1(
+                self.consumer_key,
+                client_secret=self.consumer_secret,
+                resource_owner_key=self.access_token,
+                resource_owner_secret=self.access_token_secret,
+            )
+            self._oauth_auth_token = token
+        return self._oauth_auth
+
     def get_access_token(self, username: str, password: str = "") -> tuple:
         """
         Get access token using xAuth (username/password authentication).
@@ -74,7 +138,7 @@ class InstapaperAPI:
         Returns:
             Tuple of (access_token, access_token_secret)
         """
-        auth = OAuth1Session(self.consumer_key, client_secret=self.consumer_secret)
+        auth = OAuth1(self.consumer_key, client_secret=self.consumer_secret)
 
         data = {
             "x_auth_username": username,
@@ -82,8 +146,11 @@ class InstapaperAPI:
             "x_auth_mode": "client_auth",
         }
 
-        response = requests.post(
-            f"{INSTAPAPER_BASE_URL}/oauth/access_token", auth=auth.auth, data=data
+        response = self._session.post(
+            f"{INSTAPAPER_BASE_URL}/oauth/access_token",
+            auth=auth,
+            data=data,
+            timeout=INSTAPAPER_REQUEST_TIMEOUT_SECONDS,
         )
 
         if response.status_code == 200:
@@ -120,17 +187,30 @@ class InstapaperAPI:
                 "Access token and secret are required. Call get_access_token() first."
             )
 
-        auth = OAuth1Session(
-            self.consumer_key,
-            client_secret=self.consumer_secret,
-            resource_owner_key=self.access_token,
-            resource_owner_secret=self.access_token_secret,
-        )
-
         url = f"{INSTAPAPER_BASE_URL}/{endpoint.lstrip('/')}"
 
-        response = requests.post(url, auth=auth.auth, data=params or {})
-        return response
+        # Each attempt is a new request, so OAuth signs it with a fresh nonce
+        # and timestamp. The last response is returned so callers report it
+        for attempt in range(INSTAPAPER_MAX_RETRIES + 1):
+            try:
+                response = self._session.post(
+                    url,
+                    auth=self._get_oauth_auth(),
+                    data=params or {},
+                    timeout=INSTAPAPER_REQUEST_TIMEOUT_SECONDS,
+                )
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt == INSTAPAPER_MAX_RETRIES:
+                    raise
+                time.sleep(get_retry_delay(attempt))
+                continue
+
+            if (
+                response.status_code not in INSTAPAPER_RETRY_STATUSES
+                or attempt == INSTAPAPER_MAX_RETRIES
+            ):
+                return response
+            time.sleep(get_retry_delay(attempt, response.headers.get("Retry-After")))
 
     def verify_credentials(self) -> Dict[str, Any]:
         """
@@ -142,7 +222,7 @@ class InstapaperAPI:
         response = self._make_request("/account/verify_credentials")
 
         if response.status_code == 200:
-            data = response.json()
+            data = parse_response_json(response)
             if data and data[0].get("type") == "user":
                 return data[0]
 
@@ -172,7 +252,7 @@ class InstapaperAPI:
         response = self._make_request("/bookmarks/list", params)
 
         if response.status_code == 200:
-            data = response.json()
+            data = parse_response_json(response)
 
             # Handle both old API format (list) and new API format (dict)
             if isinstance(data, list):
@@ -181,18 +261,25 @@ class InstapaperAPI:
                 highlights = []
                 user = None
                 delete_ids = []
+                # Bookmarks and highlights (the bulk of the items) are routed
+                # with a single dict lookup
+                dispatch = {
+                    "bookmark": bookmarks.append,
+                    "highlight": highlights.append,
+                }
 
                 for item in data:
-                    if isinstance(item, dict):
-                        item_type = item.get("type")
-                        if item_type == "bookmark":
-                            bookmarks.append(item)
-                        elif item_type == "highlight":
-                            highlights.append(item)
-                        elif item_type == "user":
-                            user = item
-                        elif item_type == "meta" and "delete_ids" in item:
-                            delete_ids = item.get("delete_ids", [])
+                    # Parsed JSON only ever contains plain dicts
+                    if type(item) is not dict:
+                        continue
+                    item_type = item.get("type")
+                    append = dispatch.get(item_type)
+                    if append is not None:
+                        append(item)
+                    elif item_type == "user":
+                        user = item
+                    elif item_type == "meta" and "delete_ids" in item:
+                        delete_ids = item.get("delete_ids", [])
 
                 return {
                     "bookmarks": bookmarks,
@@ -218,7 +305,7 @@ class InstapaperAPI:
         response = self._make_request("/folders/list")
 
         if response.status_code == 200:
-            data = response.json()
+            data = parse_response_json(response)
             return [item for item in data if item.get("type") == "folder"]
 
         raise Exception(
@@ -226,12 +313,34 @@ class InstapaperAPI:
         )
 
 
+def format_article(index: int, article: InstapaperNode) -> str:
+    """
+    Format a single article's block of the Instapaper prompt.
+    """
+    lines = [
+        f"\n--- Article {index} ---",
+        f"Title: {article.title}",
+        f"URL: {article.url}",
+    ]
+    if article.tags:
+        lines.append(f"Tags: {', '.join(article.tags)}")
+    if article.date:
+        lines.append(f"Date: {article.date.strftime('%Y-%m-%d')}")
+    else:
+        lines.append("Date: none")
+    lines.append(f"Read: {article.is_read}")
+    return "\n".join(lines)
+
+
 def create_instapaper_prompt(articles: List[InstapaperNode]) -> str:
     """
     Create a formatted prompt from a list of Instapaper articles.
     """
-    template = Template(INSTAPAPER_PROMPT_TEMPLATE)
-    return template.render(articles=articles)
+    prompt = io.StringIO()
+    prompt.write(INSTAPAPER_PROMPT_HEADER)
+    for index, article in enumerate(articles, 1):
+        prompt.write(format_article(index, article))
+    return prompt.getvalue()
 
 
 def create_instapaper_node_from_csv_row(row: dict) -> InstapaperNode:
@@ -241,13 +350,14 @@ def create_instapaper_node_from_csv_row(row: dict) -> InstapaperNode:
     # Parse tags from the tags field (assuming it's a string representation of a list)
     tags_str = row.get("Tags", "[]")
     try:
-        # Remove brackets and split by comma, then strip whitespace
+        # Remove the list brackets, split by comma, then strip whitespace and
+        # quotes from the ends of each tag in one pass
         tags = [
-            tag.strip().strip("\"'")
-            for tag in tags_str.strip("[]").split(",")
-            if tag.strip()
+            tag
+            for token in tags_str.strip("[]").split(",")
+            if (tag := token.strip(" \"'"))
         ]
-    except:
+    except AttributeError:
         tags = []
 
     # Determine if the article is read based on folder
@@ -332,11 +442,48 @@ def bookmark_to_instapaper_node(bookmark: Dict[str, Any]) -> InstapaperNode:
     )
 
 
+def get_folder_articles(
+    api: InstapaperAPI, folder: str, limit_per_request: int = 2000
+) -> List[InstapaperNode]:
+    """
+    Get all articles from a single Instapaper folder.
+
+    Args:
+        api: InstapaperAPI instance
+        folder: Folder to fetch ("archive", "unread", ...)
+        limit_per_request: Number of articles to fetch per request (default: 2000)
+
+    Returns:
+        List of InstapaperNode objects from the folder (empty on error)
+    """
+    articles = []
+
+    try:
+        response = api.get_bookmarks(limit=limit_per_request, folder_id=folder)
+        bookmarks = response.get("bookmarks", [])
+
+        print(f"Fetched {len(bookmarks)} bookmarks from {folder} folder")
+
+        for bookmark in bookmarks:
+            if isinstance(bookmark, dict) and bookmark.get("type") == "bookmark":
+                # Mark archive items as read
+                if folder == "archive":
+                    bookmark["folder"] = "archive"
+                article = bookmark_to_instapaper_node(bookmark)
+                articles.append(article)
+
+    except Exception as e:
+        print(f"Error fetching articles from {folder}: {e}")
+
+    return articles
+
+
 def get_all_articles(
     api: InstapaperAPI = None, limit_per_request: int = 2000
 ) -> List[InstapaperNode]:
     """
     Get all articles from Instapaper using the API from archive and unread folders.
+    The folders are fetched concurrently.
 
     Args:
         api: InstapaperAPI instance (will create one if None)
@@ -348,26 +495,18 @@ def get_all_articles(
     if api is None:
         api = InstapaperAPI()
 
-    articles = []
     folders = ["archive", "unread"]
 
-    for folder in folders:
-        try:
-            response = api.get_bookmarks(limit=limit_per_request, folder_id=folder)
-            bookmarks = response.get("bookmarks", [])
-
-            print(f"Fetched {len(bookmarks)} bookmarks from {folder} folder")
-
-            for bookmark in bookmarks:
-                if isinstance(bookmark, dict) and bookmark.get("type") == "bookmark":
-                    # Mark archive items as read
-                    if folder == "archive":
-                        bookmark["folder"] = "archive"
-                    article = bookmark_to_instapaper_node(bookmark)
-                    articles.append(article)
-
-        except Exception as e:
-            print(f"Error fetching articles from {folder}: {e}")
+    # Each folder is a separate round trip, so fetch them in parallel; map()
+    # keeps the results in folder order
+    with ThreadPoolExecutor(max_workers=len(folders)) as executor:
+        results = executor.map(
+            lambda folder: get_folder_articles(api, folder, limit_per_request),
+            folders,
+        )
+        articles = [
+            article for folder_articles in results for article in folder_articles
+        ]
 
     print(f"Successfully fetched {len(articles)} articles from Instapaper API")
     return articles
@@ -397,8 +536,8 @@ if __name__ == "__main__":
         print(f"Total articles: {len(articles)}")
 
         # Count articles by status
-        read_count = len([a for a in articles if a.is_read])
-        unread_count = len([a for a in articles if not a.is_read])
+        read_count = sum(1 for a in articles if a.is_read)
+        unread_count = len(articles) - read_count
         print(f"Read articles: {read_count}")
         print(f"Unread articles: {unread_count}")
 
@@ -1,9 +1,5 @@
 import os
-import sys
-from pathlib import Path
-
-sys.path.append(str(Path(__file__).parent.parent.parent))
-
+import operator
 import re
 import yaml
 from datetime import datetime
@@ -19,6 +15,10 @@ load_dotenv()
 # Get Obsidian path from environment variable
 OBSIDIAN_PATH = os.getenv("OBSIDIAN_PATH")
 
+# YAML frontmatter between --- markers, and daily-note filenames (YYYY-MM-DD)
+YAML_FRONTMATTER_RE = re.compile(r"^---\s*\n(.*?)\n---\s*\n", re.DOTALL)
+DATE_FILENAME_RE = re.compile(r"^(\d{4}-\d{2}-\d{2})$")
+
 # Jinja template for formatting Obsidian notes
 OBSIDIAN_PROMPT_TEMPLATE = """*** Obsidian Notes ***
 Note = filename of the note
@@ -33,18 +33,26 @@ Date: {{ note.date.strftime('%Y-%m-%d') }}{% endif %}
 Content: {{ note.markdown_content }}{% endfor %}
 """
 
+# Rendered for every query that returns notes, so it is compiled up front
+_OBSIDIAN_TEMPLATE = Template(OBSIDIAN_PROMPT_TEMPLATE)
+
 
 def create_obsidian_prompt(notes: list[ObsidianNode]) -> str:
     """
     Create a formatted prompt from a list of Obsidian nodes.
     Notes are sorted by date (most recent first).
     """
-    # Sort notes by date (most recent first, None dates at the end)
-    sorted_notes = sorted(notes, key=lambda x: (x.date is None, x.date), reverse=True)
+    # Sort notes by date (most recent first, undated notes ahead of them)
+    undated_notes = [note for note in notes if note.date is None]
+    dated_notes = sorted(
+        (note for note in notes if note.date is not None),
+        key=operator.attrgetter("date"),
+        reverse=True,
+    )
+    sorted_notes = undated_notes + dated_notes
 
     # Render the template
-    template = Template(OBSIDIAN_PROMPT_TEMPLATE)
-    return template.render(notes=sorted_notes)
+    return _OBSIDIAN_TEMPLATE.render(notes=sorted_notes)
 
 
 def split_yaml_and_content(content: str) -> Tuple[dict, str]:
@@ -52,9 +60,7 @@ def split_yaml_and_content(content: str) -> Tuple[dict, str]:
     Split YAML frontmatter from markdown content.
     Returns (yaml_data, markdown_content)
     """
-    # Pattern to match YAML frontmatter between --- markers
-    yaml_pattern = r"^---\s*\n(.*?)\n---\s*\n"
-    match = re.match(yaml_pattern, content, re.DOTALL)
+    match = YAML_FRONTMATTER_RE.match(content)
 
     if match:
         yaml_content = match.group(1)
@@ -69,10 +75,7 @@ def extract_date_from_filename(filename: str) -> datetime | None:
     """
     Extract date from filename if it matches YYYY-MM-DD format.
     """
-    import re
-
-    date_pattern = r"^(\d{4}-\d{2}-\d{2})$"
-    match = re.match(date_pattern, filename)
+    match = DATE_FILENAME_RE.match(filename)
     if match:
         try:
             return datetime.strptime(match.group(1), "%Y-%m-%d")
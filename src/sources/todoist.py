@@ -1,19 +1,25 @@
-import sys
-from pathlib import Path
-
-sys.path.append(str(Path(__file__).parent.parent.parent))
-
+import io
+import logging
+import operator
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, date, time
 from todoist_api_python.api import TodoistAPI
 import os
 from dotenv import load_dotenv
 from src.models import TodoistNode, TodoistProject
 from typing import Tuple
-from jinja2 import Template
 
+# Load environment variables from .env file
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# (access token, client) of the last client built by get_todoist_api
+_todoist_api: tuple[str, TodoistAPI] | None = None
 
-# Jinja template for formatting Todoist tasks
-TODOIST_PROMPT_TEMPLATE = """*** Todoist Tasks ***
+
+# Header of the Todoist prompt, followed by one block per task
+TODOIST_PROMPT_HEADER = """*** Todoist Tasks ***
 Task = task name
 Description = detailed task description
 Priority = priority level: 1=Highest, 2=High, 3=Medium, 4=Low
@@ -23,110 +29,191 @@ Deadline = hard deadline set by user
 Updated = when task was last modified
 Completed = when task was marked as done (date) or "False" if not completed
 Created = when task was created
-{% for task in tasks %}
---- Task {{ loop.index }} ---
-Task: {{ task.name }}{% if task.description %}
-Description: {{ task.description }}{% endif %}{% if task.priority %}
-Priority: {{ task.priority }}{% endif %}{% if task.tags %}
-Tags: {{ task.tags | join(', ') }}{% endif %}{% if task.due %}
-Due: {{ task.due.strftime('%Y-%m-%d') }}{% endif %}{% if task.deadline %}
-Deadline: {{ task.deadline.strftig('%Y-%m-%d') }}{% endif %}{% if task.created_at %}
-Created: {{ task.created_at.strftime('%Y-%m-%d') }}{% endif %}{% if task.updated_at %}
-Updated: {{ task.updated_at.strftime('%Y-%m-%d') }}{% endif %}
-Completed: {{ task.completed_at.strftime('%Y-%m-%d') if task.completed_at else 'False' }}{% endfor %}
 """
 
 
-def create_todoist_prompt(tasks: list[TodoistNode]) -> str:
+def format_task(index: int, task: TodoistNode) -> str:
+    """
+    Format a single task's block of the Todoist prompt.
+    """
+    lines = [f"\n--- Task {index} ---", f"Task: {task.name}"]
+    if task.description:
+        lines.append(f"Description: {task.description}")
+    if task.priority:
+        lines.append(f"Priority: {task.priority}")
+    if task.tags:
+        lines.append(f"Tags: {', '.join(task.tags)}")
+    if task.due:
+        lines.append(f"Due: {task.due.date().isoformat()}")
+    if task.deadline:
+        lines.append(f"Deadline: {task.deadline.date().isoformat()}")
+    if task.created_at:
+        lines.append(f"Created: {task.created_at.date().isoformat()}")
+    if task.updated_at:
+        lines.append(f"Updated: {task.updated_at.date().isoformat()}")
+    completed = task.completed_at.date().isoformat() if task.completed_at else False
+    lines.append(f"Completed: {completed}")
+    return "\n".join(lines)
+
+
+def create_todoist_prompt(tasks: list[TodoistNode], presorted: bool = False) -> str:
     """
     Create a formatted prompt from a list of Todoist tasks.
     Tasks are sorted by date (most recent first).
-    """
-    # Sort tasks by date (most recent first, None dates at the end)
-    sorted_tasks = sorted(tasks, key=lambda x: (x.date is None, x.date), reverse=True)
 
-    # Render the template
-    template = Template(TODOIST_PROMPT_TEMPLATE)
-    return template.render(tasks=sorted_tasks)
+    presorted=True means tasks are already in prompt order (undated first,
+    then most recent first), so they are not sorted again.
+    """
+    # Sort tasks by date (most recent first), with undated tasks ahead of
+    # dated ones
+    if presorted:
+        sorted_tasks = tasks
+    else:
+        # Partition out undated tasks so the sort compares bare dates
+        undated_tasks, dated_tasks = [], []
+        for task in tasks:
+            (undated_tasks if task.date is None else dated_tasks).append(task)
+        dated_tasks.sort(key=operator.attrgetter("date"), reverse=True)
+        sorted_tasks = undated_tasks + dated_tasks
+
+    prompt = io.StringIO()
+    prompt.write(TODOIST_PROMPT_HEADER)
+    for index, task in enumerate(sorted_tasks, 1):
+        prompt.write(format_task(index, task))
+    return prompt.getvalue()
 
 
 def get_todoist_api() -> TodoistAPI | None:
     """
     Initialize and return Todoist API client.
+    The client is shared by later calls while the access token is unchanged.
     """
-    # Load environment variables from .env file
-    load_dotenv()
+    global _todoist_api
 
     # Initialize Todoist API client
     TODOIST_TOKEN = os.getenv("TODOIST_ACCESS_TOKEN")
     if not TODOIST_TOKEN:
-        print("Warning: TODOIST_ACCESS_TOKEN not found in environment variables")
+        logger.warning("TODOIST_ACCESS_TOKEN not found in environment variables")
         return None
 
-    return TodoistAPI(TODOIST_TOKEN)
+    # Only a successfully built client is kept, so a token added later is used
+    if _todoist_api is None or _todoist_api[0] != TODOIST_TOKEN:
+        _todoist_api = (TODOIST_TOKEN, TodoistAPI(TODOIST_TOKEN))
+    return _todoist_api[1]
 
 
-def get_all_tasks(api: TodoistAPI, projects: list[TodoistProject]) -> list[TodoistNode]:
+def fetch_active_tasks(api: TodoistAPI) -> list | None:
     """
-    Get all active tasks from Todoist API.
+    Fetch all active tasks from Todoist API, as returned by the API.
 
     Args:
         api: Todoist API client
-        projects: List of TodoistProject objects for task association
-    """
-    print("Fetching all active tasks...")
-    task_nodes = []
 
+    Returns:
+        List of API tasks, or None if the request failed
+    """
+    logger.info("Fetching all active tasks...")
     try:
-        tasks_paginator = api.get_tasks()
-        for task_page in tasks_paginator:
-            for task in task_page:
-                task_nodes.append(create_todoist_node_from_api_response(task, projects))
-
-        print(f"Fetched {len(task_nodes)} active tasks")
-        return task_nodes
+        tasks = []
+        for task_page in api.get_tasks():
+            tasks.extend(task_page)
     except Exception as e:
-        print(f"Error fetching active tasks: {e}")
-        return []
+        logger.error("Error fetching active tasks: %s", e)
+        return None
 
+    logger.info("Fetched %d active tasks", len(tasks))
+    return tasks
 
-def get_completed_tasks_past_days(
-    api: TodoistAPI, projects: list[TodoistProject], days_back: int = 7
-) -> list[TodoistNode]:
+
+def fetch_completed_tasks(
+    api: TodoistAPI,
+    days_back: int = 7,
+    *,
+    end_date: datetime | None = None,
+) -> list | None:
     """
-    Get completed tasks from the past N days.
+    Fetch tasks completed in the past N days, as returned by the API.
 
     Args:
         api: Todoist API client
-        projects: List of TodoistProject objects for task association
         days_back: Number of days to look back (default: 7)
-    """
-    print(f"Fetching completed tasks from the past {days_back} days...")
-    completed_task_nodes = []
+        end_date: End of the window (default: now)
 
+    Returns:
+        List of API tasks, or None if the request failed
+    """
+    logger.info("Fetching completed tasks from the past %d days...", days_back)
     try:
         # Calculate date range
-        end_date = datetime.now()
+        if end_date is None:
+            end_date = datetime.now()
         start_date = end_date - timedelta(days=days_back)
 
         completed_tasks_paginator = api.get_completed_tasks_by_completion_date(
             since=start_date,
             until=end_date,
         )
-
+        tasks = []
         for task_page in completed_tasks_paginator:
-            for completed_task in task_page:
-                completed_task_nodes.append(
-                    create_todoist_node_from_api_response(completed_task, projects)
-                )
+            tasks.extend(task_page)
+    except Exception as e:
+        logger.error("Error fetching completed tasks: %s", e)
+        return None
+
+    logger.info(
+        "Fetched %d completed tasks from the past %d days", len(tasks), days_back
+    )
+    return tasks
 
-        print(
-            f"Fetched {len(completed_task_nodes)} completed tasks from the past {days_back} days"
+
+def build_task_nodes(tasks: list, projects: list[TodoistProject]) -> list[TodoistNode]:
+    """
+    Create TodoistNodes from API tasks, tagging each with its project name.
+
+    Args:
+        tasks: Tasks returned by the API
+        projects: List of TodoistProject objects for task association
+    """
+    project_by_id = get_project_by_id(projects)
+    # Shared so repeated label strings collapse to one object per label
+    tag_cache = {}
+    return [
+        create_todoist_node_from_task_with_project(
+            task, project_by_id.get(task.project_id), tag_cache
         )
-        return completed_task_nodes
-    except Exception as e:
-        print(f"Error fetching completed tasks: {e}")
-        return []
+        for task in tasks
+    ]
+
+
+def get_all_tasks(api: TodoistAPI, projects: list[TodoistProject]) -> list[TodoistNode]:
+    """
+    Get all active tasks from Todoist API.
+
+    Args:
+        api: Todoist API client
+        projects: List of TodoistProject objects for task association
+    """
+    return build_task_nodes(fetch_active_tasks(api) or [], projects)
+
+
+def get_completed_tasks_past_days(
+    api: TodoistAPI,
+    projects: list[TodoistProject],
+    days_back: int = 7,
+    *,
+    end_date: datetime | None = None,
+) -> list[TodoistNode]:
+    """
+    Get completed tasks from the past N days.
+
+    Args:
+        api: Todoist API client
+        projects: List of TodoistProject objects for task association
+        days_back: Number of days to look back (default: 7)
+        end_date: End of the window (default: now)
+    """
+    completed_tasks = fetch_completed_tasks(api, days_back, end_date=end_date)
+    return build_task_nodes(completed_tasks or [], projects)
 
 
 def get_completed_tasks_past_week(
@@ -142,19 +229,20 @@ def get_all_projects(api: TodoistAPI) -> list[TodoistProject]:
     """
     Get all projects from Todoist API.
     """
-    print("Fetching all projects...")
+    logger.info("Fetching all projects...")
     project_nodes = []
 
     try:
         project_paginator = api.get_projects()
         for project_page in project_paginator:
-            for project in project_page:
-                project_nodes.append(create_todoist_project_from_api_response(project))
+            project_nodes.extend(
+                map(create_todoist_project_from_api_response, project_page)
+            )
 
-        print(f"Fetched {len(project_nodes)} projects")
+        logger.info("Fetched %d projects", len(project_nodes))
         return project_nodes
     except Exception as e:
-        print(f"Error fetching projects: {e}")
+        logger.error("Error fetching projects: %s", e)
         return []
 
 
@@ -173,13 +261,19 @@ def get_all_todoist_data(
     """
     api = get_todoist_api()
     if not api:
-        print("Failed to initialize Todoist API")
+        logger.error("Failed to initialize Todoist API")
         return [], [], []
 
-    # Get projects first, then tasks
-    projects = get_all_projects(api)
-    active_tasks = get_all_tasks(api, projects)
-    completed_tasks = get_completed_tasks_past_days(api, projects, days_back)
+    # Projects, active tasks and completed tasks are independent requests, so
+    # fetch all three concurrently; nodes are built once projects are known
+    # (tasks are tagged with their project name)
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        projects_future = executor.submit(get_all_projects, api)
+        active_future = executor.submit(fetch_active_tasks, api)
+        completed_future = executor.submit(fetch_completed_tasks, api, days_back)
+        projects = projects_future.result()
+        active_tasks = build_task_nodes(active_future.result() or [], projects)
+        completed_tasks = build_task_nodes(completed_future.result() or [], projects)
 
     return active_tasks, completed_tasks, projects
 
@@ -194,23 +288,23 @@ def strip_timezone(
     if dt is None:
         return None
 
-    # If it's a date object, convert to datetime
-    if isinstance(dt, date) and not isinstance(dt, datetime):
-        return datetime.combine(dt, time.min)
+    # Dispatch on the exact type first (the common case for API values)
+    dt_type = type(dt)
+    if dt_type is not datetime and dt_type is not date:
+        # Subclasses of date/datetime are classified once with isinstance
+        if isinstance(dt, datetime):
+            dt_type = datetime
+        elif isinstance(dt, date):
+            dt_type = date
+        else:
+            return dt
 
     # If it's a datetime object with timezone info, remove it
-    if isinstance(dt, datetime) and dt.tzinfo is not None:
-        return dt.replace(tzinfo=None)
-
-    return dt
-
+    if dt_type is datetime:
+        return dt.replace(tzinfo=None) if dt.tzinfo is not None else dt
 
-def get_union_of_labels_and_project(task, projects: list) -> list[str]:
-    """
-    Get the union of the labels and the project name.
-    """
-    project_name = get_project_name(task, projects)
-    return task.labels + [project_name] if project_name else task.labels
+    # If it's a date object, convert to datetime
+    return datetime.combine(dt, time.min)
 
 
 def get_canonical_date(task) -> datetime | None:
@@ -228,30 +322,42 @@ def get_canonical_date(task) -> datetime | None:
     return None
 
 
-def get_project_name(task, projects: list) -> str | None:
+def get_project_by_id(
+    projects: list[TodoistProject],
+) -> dict[str, TodoistProject]:
     """
-    Get the project name of the task.
+    Map project IDs to projects, for constant-time lookups per task.
     """
-    return next(
-        (project.name for project in projects if project.project_id == task.project_id),
-        None,
-    )
+    return {project.project_id: project for project in projects}
 
 
 def get_union_of_labels_and_project_with_project(task, project) -> list[str]:
     """
     Get the union of the labels and the project name.
     """
-    combined_tags = set(task.labels)
-    if project and project.name:
-        combined_tags.add(project.name)
-    return list(combined_tags)
+    # Labels are already unique, so only the project name needs a membership
+    # test; label order stays stable across runs
+    if project and project.name and project.name not in task.labels:
+        return task.labels + [project.name]
+    return task.labels
 
 
-def create_todoist_node_from_task_with_project(task, project):
+def create_todoist_node_from_task_with_project(
+    task, project, tag_cache: dict[str, str] | None = None
+):
     """
     Create TodoistNode from task with project information for proper tag generation.
+
+    If tag_cache is given, label and tag strings are deduplicated through it so
+    that tasks sharing a label share one string object.
     """
+    labels = task.labels
+    tags = get_union_of_labels_and_project_with_project(task, project)
+    if tag_cache is not None:
+        intern = tag_cache.setdefault
+        labels = [intern(label, label) for label in labels]
+        tags = [intern(tag, tag) for tag in tags]
+
     return TodoistNode(
         name=task.content,  # Use content as the name
         task_id=task.id,
@@ -259,15 +365,15 @@ def create_todoist_node_from_task_with_project(task, project):
         description=task.description,
         project_id=task.project_id,
         parent_id=task.parent_id,
-        labels=task.labels,
+        labels=labels,
         priority=task.priority,
-        due=strip_timezone(task.due),
+        due=strip_timezone(task.due.date if task.due else None),
         deadline=strip_timezone(task.deadline),
         completed_at=strip_timezone(task.completed_at),
         created_at=strip_timezone(task.created_at),
         updated_at=strip_timezone(task.updated_at),
-        date=strip_timezone(get_canonical_date(task)),
-        tags=get_union_of_labels_and_project_with_project(task, project),
+        date=get_canonical_date(task),  # Already timezone-naive
+        tags=tags,
     )
 
 
@@ -281,30 +387,9 @@ def create_todoist_project_from_api_response(response):
     )
 
 
-def create_todoist_node_from_api_response(task, projects: list):
-    """
-    Create TodoistNode from API response.
-    """
-    return TodoistNode(
-        name=task.content,  # Use content as the name
-        task_id=task.id,
-        content=task.content,
-        description=task.description,
-        project_id=task.project_id,
-        parent_id=task.parent_id,
-        labels=task.labels,
-        priority=task.priority,
-        due=strip_timezone(task.due.date if task.due else None),
-        deadline=strip_timezone(task.deadline),
-        completed_at=strip_timezone(task.completed_at),
-        created_at=strip_timezone(task.created_at),
-        updated_at=strip_timezone(task.updated_at),
-        date=strip_timezone(get_canonical_date(task)),
-        tags=get_union_of_labels_and_project(task, projects),
-    )
-
-
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
     # Test the functionality with different time ranges
     print("Testing with default 7 days:")
     active_tasks, completed_tasks, projects = get_all_todoist_data()
@@ -5,38 +5,106 @@ This file loads tag descriptions from a JSON file to provide context
 to the model when using the query tool.
 """
 
-import json
+import functools
 import os
+import sys
 from pathlib import Path
+from types import MappingProxyType
+from typing import Mapping
+
+from src.json_utils import json_loads
+
+# Parsed JSON files: absolute path -> (st_mtime_ns, parsed contents)
+_json_cache: dict[Path, tuple[int, dict]] = {}
+
+
+def load_json_cached(path: Path) -> dict | None:
+    """
+    Load a JSON file, reusing the previous parse if the file is unchanged.
+
+    Args:
+        path: Path of the JSON file
+
+    Returns:
+        Parsed contents, or None if the file doesn't exist
+    """
+    path = path.absolute()
+    try:
+        mtime_ns = path.stat().st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+    cached = _json_cache.get(path)
+    if cached and cached[0] == mtime_ns:
+        return cached[1]
+
+    data = json_loads(path.read_bytes())
+    _json_cache[path] = (mtime_ns, data)
+    return data
 
 
 def load_tag_descriptions() -> dict:
     """
     Load tag descriptions from JSON file.
+    Files that haven't changed since the last load are not parsed again.
 
     Returns:
         Dictionary of tag descriptions organized by source
     """
-    # Try to load custom tag descriptions first
-    custom_path = Path("tag_descriptions.json")
-    if custom_path.exists():
-        with open(custom_path, "r", encoding="utf-8") as f:
-            return json.load(f)
-
-    # Fall back to template if custom file doesn't exist
-    template_path = Path("tag_descriptions_template.json")
-    if template_path.exists():
-        with open(template_path, "r", encoding="utf-8") as f:
-            return json.load(f)
+    # Try to load custom tag descriptions first, then fall back to template
+    # if custom file doesn't exist
+    for path in (Path("tag_descriptions.json"), Path("tag_descriptions_template.json")):
+        data = load_json_cached(path)
+        if data is not None:
+            return data
 
     # If neither exists, return empty dict
     return {}
 
 
+def freeze_tag_descriptions(tag_descriptions: dict) -> MappingProxyType:
+    """
+    Make loaded tag descriptions read-only, interning source and tag names.
+
+    Args:
+        tag_descriptions: Dictionary of tag descriptions organized by source
+
+    Returns:
+        Read-only mapping of read-only per-source mappings
+    """
+    return MappingProxyType(
+        {
+            sys.intern(source): MappingProxyType(
+                {sys.intern(tag): description for tag, description in tags.items()}
+            )
+            for source, tags in tag_descriptions.items()
+        }
+    )
+
+
+def flatten_tag_descriptions(tag_descriptions: Mapping) -> dict:
+    """
+    Flatten tag descriptions into a single dictionary.
+
+    Args:
+        tag_descriptions: Dictionary of tag descriptions organized by source
+
+    Returns:
+        Dictionary mapping (source, tag) to the tag's description
+    """
+    return {
+        (source, tag): description
+        for source, tags in tag_descriptions.items()
+        for tag, description in tags.items()
+    }
+
+
 # Load tag descriptions on module import
-TAG_DESCRIPTIONS = load_tag_descriptions()
+TAG_DESCRIPTIONS = freeze_tag_descriptions(load_tag_descriptions())
+_FLAT_TAG_DESCRIPTIONS = flatten_tag_descriptions(TAG_DESCRIPTIONS)
 
 
+@functools.lru_cache(maxsize=512)
 def get_tag_description(source: str, tag: str) -> str:
     """
     Get the description for a specific tag in a specific source.
@@ -48,10 +116,10 @@ def get_tag_description(source: str, tag: str) -> str:
     Returns:
         Description of the tag, or "No description available" if not found
     """
-    return TAG_DESCRIPTIONS.get(source, {}).get(tag, "No description available")
+    return _FLAT_TAG_DESCRIPTIONS.get((source, tag), "No description available")
 
 
-def get_all_tag_descriptions() -> dict:
+def get_all_tag_descriptions() -> Mapping:
     """
     Get all tag descriptions organized by source.
 
@@ -61,7 +129,7 @@ def get_all_tag_descriptions() -> dict:
     return TAG_DESCRIPTIONS
 
 
-def get_source_tag_descriptions(source: str) -> dict:
+def get_source_tag_descriptions(source: str) -> Mapping:
     """
     Get all tag descriptions for a specific source.
 
@@ -74,15 +142,17 @@ def get_source_tag_descriptions(source: str) -> dict:
     return TAG_DESCRIPTIONS.get(source, {})
 
 
-def reload_tag_descriptions() -> dict:
+def reload_tag_descriptions() -> Mapping:
     """
     Reload tag descriptions from JSON file.
 
     Returns:
         Updated dictionary of tag descriptions
     """
-    global TAG_DESCRIPTIONS
-    TAG_DESCRIPTIONS = load_tag_descriptions()
+    global TAG_DESCRIPTIONS, _FLAT_TAG_DESCRIPTIONS
+    TAG_DESCRIPTIONS = freeze_tag_descriptions(load_tag_descriptions())
+    _FLAT_TAG_DESCRIPTIONS = flatten_tag_descriptions(TAG_DESCRIPTIONS)
+    get_tag_description.cache_clear()
     return TAG_DESCRIPTIONS
 
 